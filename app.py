@@ -1,65 +1,830 @@
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QLabel, QPushButton, QTextEdit)
-from PyQt5.QtGui import QTextCharFormat, QColor, QSyntaxHighlighter, QFont
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QDateTime
-from difflib import SequenceMatcher
+                            QHBoxLayout, QLabel, QPushButton, QTextEdit, QPlainTextEdit, QCheckBox)
+from PyQt5.QtGui import (QTextCharFormat, QColor, QSyntaxHighlighter, QFont, QTextCursor,
+                         QTextBlockUserData)
+from PyQt5.QtCore import Qt, QTimer, QPoint, QObject, QRunnable, QThreadPool, pyqtSignal, QDateTime
+from itertools import accumulate
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
+import difflib
 import sys
+import re
+import time
+import threading
+
+try:
+    # Drop-in C implementation of difflib's matcher with the same opcode API
+    from cdifflib import CSequenceMatcher as SequenceMatcher
+except ImportError:
+    SequenceMatcher = None  # TrimmedSequenceMatcher below
+
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:
+    Levenshtein = None
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+try:
+    from patiencediff import PatienceSequenceMatcher
+except ImportError:
+    PatienceSequenceMatcher = None
+
+_WORD_RE = re.compile(r'\S+')
+_TOKEN_RE = re.compile(r'\S+|\s+')  # Words and the whitespace runs between them
+
+# What QTextDocument.toPlainText() makes of the separators and non-breaking spaces
+# a cursor selection returns as they are
+_PLAIN_TEXT_TABLE = str.maketrans({
+    '\u2029': '\n', '\u2028': '\n', '\ufdd0': '\n', '\ufdd1': '\n', '\xa0': ' ',
+})
+
+class TrimmedSequenceMatcher(difflib.SequenceMatcher):
+    """difflib's matcher with the b2j positions of each element trimmed to the
+    searched range on first use (as in CPython gh-106877), so the inner loop of
+    find_longest_match no longer range checks every position of every a[i]"""
+    def find_longest_match(self, alo=0, ahi=None, blo=0, bhi=None):
+        a, b, b2j, isbjunk = self.a, self.b, self.b2j, self.bjunk.__contains__
+        if ahi is None:
+            ahi = len(a)
+        if bhi is None:
+            bhi = len(b)
+        besti, bestj, bestsize = alo, blo, 0
+        # j2len[j] = length of the longest junk-free match ending with a[i-1] and b[j]
+        j2len = {}
+        in_range = {}  # element -> its positions in b[blo:bhi], b2j lists are sorted
+        nothing = ()
+        for i in range(alo, ahi):
+            element = a[i]
+            positions = in_range.get(element)
+            if positions is None:
+                positions = b2j.get(element, nothing)
+                if positions:
+                    positions = positions[bisect_left(positions, blo):bisect_left(positions, bhi)]
+                in_range[element] = positions
+            j2lenget = j2len.get
+            newj2len = {}
+            for j in positions:
+                k = newj2len[j] = j2lenget(j - 1, 0) + 1
+                if k > bestsize:
+                    besti, bestj, bestsize = i - k + 1, j - k + 1, k
+            j2len = newj2len
+
+        # Extend by non-junk and then junk elements on each end, exactly like difflib
+        while besti > alo and bestj > blo and \
+              not isbjunk(b[bestj - 1]) and a[besti - 1] == b[bestj - 1]:
+            besti, bestj, bestsize = besti - 1, bestj - 1, bestsize + 1
+        while besti + bestsize < ahi and bestj + bestsize < bhi and \
+              not isbjunk(b[bestj + bestsize]) and a[besti + bestsize] == b[bestj + bestsize]:
+            bestsize += 1
+        while besti > alo and bestj > blo and \
+              isbjunk(b[bestj - 1]) and a[besti - 1] == b[bestj - 1]:
+            besti, bestj, bestsize = besti - 1, bestj - 1, bestsize + 1
+        while besti + bestsize < ahi and bestj + bestsize < bhi and \
+              isbjunk(b[bestj + bestsize]) and a[besti + bestsize] == b[bestj + bestsize]:
+            bestsize += 1
+        return difflib.Match(besti, bestj, bestsize)
+
+if SequenceMatcher is None:
+    SequenceMatcher = TrimmedSequenceMatcher
+
+def count_words(text):
+    """Count whitespace separated words without materializing them like str.split()"""
+    if not text or text.isspace():
+        return 0
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+# difflib's autojunk heuristic treats elements making up more than 1% of a long
+# sequence as junk. On lines and tokens that bounds the worst case on big
+# repetitive inputs at the cost of a possibly less minimal diff, so it is used
+# for those from this size on. Characters always match exactly: there every
+# common letter would be junk and the diff collapse into one large replace.
+AUTOJUNK_MIN_SIZE = 20000
+FAST_AUTOJUNK_MIN_SIZE = 2000  # Used instead in fast mode for lines and tokens, trading exactness for speed
+CACHED_HUNK_MAX_SIZE = 32768  # Combined length above which hunk opcodes aren't memoized
+MYERS_MAX_EDITS = 1000  # Above this the Myers trace gets too big, use difflib instead
+MYERS_LINES_MIN_SIZE = 50000  # Texts from this size on diff their lines with the kernel too
+MYERS_LINEAR_SPACE = True  # Beyond MYERS_MAX_EDITS use the linear space variant instead of difflib
+MYERS_MAX_STEPS = 50000000  # Work budget of the linear space variant before giving up
+
+def _myers_trace(a, b, max_d):
+    """Forward pass of Myers' O(ND) diff over two integer arrays.
+    
+    Stores the furthest reaching x of every diagonal for each edit count d
+    (band d starts at index d * d) and returns (trace, d), or (trace, -1)
+    when more than max_d edits would be needed."""
+    n = len(a)
+    m = len(b)
+    offset = max_d + 1
+    v = np.zeros(2 * max_d + 3, dtype=np.int32)
+    trace = np.zeros((max_d + 1) * (max_d + 1), dtype=np.int32)
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                for kk in range(-d, d + 1):
+                    trace[d * d + kk + d] = v[offset + kk]
+                return trace, d
+        for kk in range(-d, d + 1):
+            trace[d * d + kk + d] = v[offset + kk]
+    return trace, -1
+
+def _myers_bisect(a, b, a_lo, a_hi, b_lo, b_hi, v1, v2, max_steps):
+    """Find where the forward and reverse Myers paths of a[a_lo:a_hi] -> b[b_lo:b_hi]
+    meet (the middle snake) and return (x, y, steps) relative to the segment, or
+    (-1, -1, steps) if they don't meet within max_steps. v1 and v2 are scratch arrays"""
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    max_d = (n + m + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d
+    for i in range(v_length):
+        v1[i] = -1
+        v2[i] = -1
+    v1[v_offset + 1] = 0
+    v2[v_offset + 1] = 0
+    delta = n - m
+    front = delta % 2 != 0  # Odd delta: the forward path detects the overlap
+    k1start = k1end = k2start = k2end = 0
+    steps = 0
+    for d in range(max_d):
+        if steps > max_steps:
+            break
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+            steps += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1end += 2  # Ran off the right of the graph
+            elif y1 > m:
+                k1start += 2  # Ran off the bottom of the graph
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= n - v2[k2_offset]:
+                        return x1, y1, steps
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[a_hi - x2 - 1] == b[b_hi - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            steps += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2end += 2
+            elif y2 > m:
+                k2start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    if x1 >= n - x2:
+                        return x1, v_offset + x1 - k1_offset, steps
+    return -1, -1, steps
+
+def _myers_linear_snakes(a, b, max_steps):
+    """Matching runs (x, y, size) of a -> b, found by splitting both sequences at
+    middle snakes (Myers' linear space refinement), so memory stays O(N + M).
+    Returns (snakes, count), or (snakes, -1) once max_steps is exceeded."""
+    n = len(a)
+    m = len(b)
+    snakes = np.zeros((min(n, m) + 1, 3), dtype=np.int64)
+    count = 0
+    v1 = np.zeros(n + m + 2, dtype=np.int64)
+    v2 = np.zeros(n + m + 2, dtype=np.int64)
+    # Work items: (0, a_lo, a_hi, b_lo, b_hi) diffs a segment, (1, x, y, size, 0)
+    # emits a run; pushed in reverse so runs come out in order
+    stack = np.zeros((3 * (n + m) + 3, 5), dtype=np.int64)
+    stack[0, 0] = 0
+    stack[0, 1] = 0
+    stack[0, 2] = n
+    stack[0, 3] = 0
+    stack[0, 4] = m
+    top = 1
+    steps = 0
+    while top > 0:
+        top -= 1
+        kind, a_lo, a_hi, b_lo, b_hi = stack[top]
+        if kind == 1:
+            snakes[count, 0] = a_lo
+            snakes[count, 1] = a_hi
+            snakes[count, 2] = b_lo
+            count += 1
+            continue
+        # Common prefix is emitted now, common suffix after the middle part
+        size = 0
+        while a_lo + size < a_hi and b_lo + size < b_hi and a[a_lo + size] == b[b_lo + size]:
+            size += 1
+        if size:
+            snakes[count, 0] = a_lo
+            snakes[count, 1] = b_lo
+            snakes[count, 2] = size
+            count += 1
+            a_lo += size
+            b_lo += size
+        suffix = 0
+        while a_lo < a_hi - suffix and b_lo < b_hi - suffix and a[a_hi - suffix - 1] == b[b_hi - suffix - 1]:
+            suffix += 1
+        a_hi -= suffix
+        b_hi -= suffix
+        if suffix:
+            stack[top, 0] = 1
+            stack[top, 1] = a_hi
+            stack[top, 2] = b_hi
+            stack[top, 3] = suffix
+            top += 1
+        if a_lo == a_hi or b_lo == b_hi:
+            continue  # A pure insert or delete, nothing matches
+        x, y, used = _myers_bisect(a, b, a_lo, a_hi, b_lo, b_hi, v1, v2, max_steps - steps)
+        steps += used
+        if steps > max_steps:
+            return snakes, -1
+        if x < 0 or (x == 0 and y == 0) or (x == a_hi - a_lo and y == b_hi - b_lo):
+            continue  # No usable split, the whole segment is one replace
+        stack[top, 0] = 0
+        stack[top, 1] = a_lo + x
+        stack[top, 2] = a_hi
+        stack[top, 3] = b_lo + y
+        stack[top, 4] = b_hi
+        stack[top + 1, 0] = 0
+        stack[top + 1, 1] = a_lo
+        stack[top + 1, 2] = a_lo + x
+        stack[top + 1, 3] = b_lo
+        stack[top + 1, 4] = b_lo + y
+        top += 2
+    return snakes, count
+
+if njit is not None:
+    _myers_trace = njit(cache=True)(_myers_trace)
+    _myers_bisect = njit(cache=True)(_myers_bisect)
+    _myers_linear_snakes = njit(cache=True)(_myers_linear_snakes)
+
+# Set once warm_up_kernels() compiled the kernels; until then the diff paths use
+# their pure Python fallbacks instead of waiting for the compiler
+_kernels_ready = threading.Event()
+
+def _code_arrays(a, b):
+    """Both texts as numpy code point arrays, one byte per character for ASCII"""
+    if a.isascii() and b.isascii():
+        return (np.frombuffer(a.encode('ascii'), dtype=np.uint8),
+                np.frombuffer(b.encode('ascii'), dtype=np.uint8))
+    return (np.frombuffer(a.encode('utf-32-le'), dtype=np.uint32),
+            np.frombuffer(b.encode('utf-32-le'), dtype=np.uint32))
+
+def myers_opcodes(a, b, max_d=MYERS_MAX_EDITS):
+    """Opcodes for a -> b using the jitted Myers kernel, or None if it can't be used"""
+    if not _kernels_ready.is_set():
+        return None
+    return myers_code_opcodes(*_code_arrays(a, b), max_d)
+
+def intern_lines(lines_a, lines_b):
+    """Number the distinct lines of both sides, so the kernel compares integers"""
+    ids = {}
+    codes_a = np.array([ids.setdefault(line, len(ids)) for line in lines_a], dtype=np.uint32)
+    codes_b = np.array([ids.setdefault(line, len(ids)) for line in lines_b], dtype=np.uint32)
+    return codes_a, codes_b
+
+def myers_code_opcodes(codes_a, codes_b, max_d=MYERS_MAX_EDITS):
+    """Opcodes for two code arrays from the jitted Myers kernels, or None when
+    more than max_d edits are needed and the linear space variant is off or
+    runs out of its work budget"""
+    max_d = min(max_d, len(codes_a) + len(codes_b))
+    trace, edits = _myers_trace(codes_a, codes_b, max_d)
+    if edits < 0:
+        if not MYERS_LINEAR_SPACE:
+            return None
+        runs, count = _myers_linear_snakes(codes_a, codes_b, MYERS_MAX_STEPS)
+        if count < 0:
+            return None
+        return _snakes_to_opcodes(runs[:count].tolist(), len(codes_a), len(codes_b))
+    
+    # Walk back through the trace collecting the matching runs (snakes)
+    snakes = []
+    x, y = len(codes_a), len(codes_b)
+    for d in range(edits, 0, -1):
+        k = x - y
+        band = (d - 1) * (d - 1) + (d - 1)
+        if k == -d or (k != d and trace[band + k - 1] < trace[band + k + 1]):
+            prev_k = k + 1
+            prev_x = int(trace[band + prev_k])
+            mid_x = prev_x
+        else:
+            prev_k = k - 1
+            prev_x = int(trace[band + prev_k])
+            mid_x = prev_x + 1
+        if x > mid_x:
+            snakes.append((mid_x, mid_x - k, x - mid_x))
+        x, y = prev_x, prev_x - prev_k
+    if x > 0:
+        snakes.append((0, 0, x))
+    snakes.reverse()
+    return _snakes_to_opcodes(snakes, len(codes_a), len(codes_b))
+
+def _snakes_to_opcodes(snakes, n, m):
+    """Opcodes from the ordered matching runs (x, y, size) of two sequences of
+    lengths n and m; everything between two runs is a delete, insert or replace"""
+    opcodes = []
+    i = j = 0
+    for x, y, size in snakes + [(n, m, 0)]:
+        if i < x and j < y:
+            opcodes.append(('replace', i, x, j, y))
+        elif i < x:
+            opcodes.append(('delete', i, x, j, y))
+        elif j < y:
+            opcodes.append(('insert', i, x, j, y))
+        if size:
+            _append_opcode(opcodes, ('equal', x, x + size, y, y + size))
+        i, j = x + size, y + size
+    return opcodes
+
+def warm_up_kernels():
+    """Compile the jitted kernels up front so no comparison pays for it; meant to
+    run on a pooled thread, comparisons started meanwhile use the fallbacks"""
+    if njit is None:
+        return
+    try:
+        # max_d=1 is exceeded, so the linear space kernel gets compiled as well
+        myers_code_opcodes(*_code_arrays("warm up", "warmed up"), 1)  # ASCII, uint8 codes
+        myers_code_opcodes(*_code_arrays("warm up", "wärmed up"), 1)  # Anything else, uint32 codes
+        myers_code_opcodes(*intern_lines(["warm\n", "up\n"], ["warmed\n", "upp\n"]), 1)  # Line ids
+    except Exception as e:
+        print(f"Error compiling diff kernels: {e}")
+        return
+    _kernels_ready.set()
+
+def use_autojunk(size, fast=False):
+    """Whether a difflib matcher over a second line or token sequence of this size
+    should use autojunk; character sequences never do"""
+    return size > (FAST_AUTOJUNK_MIN_SIZE if fast else AUTOJUNK_MIN_SIZE)
+
+def compute_opcodes(a, b):
+    """Return the (tag, i1, i2, j1, j2) opcodes that turn a into b"""
+    # Trivial cases don't need a matcher at all
+    if a == b:
+        return [('equal', 0, len(a), 0, len(b))] if a else []
+    if not a or not b:
+        return [('insert' if not a else 'delete', 0, len(a), 0, len(b))]
+    if Levenshtein is not None:
+        # C++ bit-parallel implementation, much faster than pure-Python difflib
+        return Levenshtein.opcodes(a, b).as_list()  # Tuples built in C++ as well
+    opcodes = myers_opcodes(a, b)
+    if opcodes is not None:
+        return opcodes
+    if a.isascii() and b.isascii():
+        # Small ints hash far cheaper than 1-char strings when building b2j, and
+        # for ASCII the byte offsets are the character offsets
+        a, b = a.encode('ascii'), b.encode('ascii')
+    return SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+
+@lru_cache(maxsize=256)
+def _memoized_opcodes(a, b):
+    """compute_opcodes behind the bounded cache of cached_opcodes"""
+    return tuple(compute_opcodes(a, b))
+
+def cached_opcodes(a, b):
+    """compute_opcodes memoized on the texts, replaced hunks away from the edit
+    recur unchanged on every full re-diff (and on undo/redo). The cache keeps its
+    keys alive, so big hunks are diffed without it"""
+    if len(a) + len(b) > CACHED_HUNK_MAX_SIZE:
+        return tuple(compute_opcodes(a, b))
+    return _memoized_opcodes(a, b)
+
+def cached_token_opcodes(a, b):
+    """Opcodes for a -> b at word granularity: words and whitespace runs are matched
+    as whole tokens, a sequence several times shorter than the characters. Like
+    cached_opcodes, only small hunks go through the cache"""
+    if len(a) + len(b) > CACHED_HUNK_MAX_SIZE:
+        return token_opcodes(a, b)
+    return _memoized_token_opcodes(a, b)
+
+@lru_cache(maxsize=256)
+def _memoized_token_opcodes(a, b):
+    """token_opcodes behind the bounded cache of cached_token_opcodes"""
+    return token_opcodes(a, b)
+
+def token_opcodes(a, b):
+    """Opcodes for a -> b matching words and whitespace runs as whole tokens"""
+    tokens_a = _TOKEN_RE.findall(a)
+    tokens_b = _TOKEN_RE.findall(b)
+    offsets_a = list(accumulate(map(len, tokens_a), initial=0))
+    offsets_b = list(accumulate(map(len, tokens_b), initial=0))
+    matcher = SequenceMatcher(None, tokens_a, tokens_b, autojunk=use_autojunk(len(tokens_b), True))
+    opcodes = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        _append_opcode(opcodes, (tag, offsets_a[i1], offsets_a[i2], offsets_b[j1], offsets_b[j2]))
+    return tuple(opcodes)
+
+# Patience diff anchors on lines that are unique on both sides, which keeps it near
+# linear on large code-like input where difflib can degrade and align repeated lines oddly
+PATIENCE_MIN_SIZE = 4000
+PATIENCE_MIN_UNIQUE_RATIO = 0.3
+
+def unique_line_ratio(lines):
+    """Fraction of distinct lines, a cheap hint for how well patience diff can anchor"""
+    return len(set(lines)) / len(lines) if lines else 0.0
+
+_line_matchers = threading.local()  # .last = (autojunk, lines_b, matcher) of this thread
+
+def use_patience(lines_b, size):
+    """Whether patience diff is available and suits these lines"""
+    return (PatienceSequenceMatcher is not None and size > PATIENCE_MIN_SIZE
+            and unique_line_ratio(lines_b) > PATIENCE_MIN_UNIQUE_RATIO)
+
+def line_matcher(lines_a, lines_b, size, fast=False):
+    """Matcher over whole lines: patience diff for large varied input, difflib otherwise"""
+    if use_patience(lines_b, size):
+        return PatienceSequenceMatcher(None, lines_a, lines_b)
+    autojunk = use_autojunk(len(lines_b), fast)
+    # Editing only the first text leaves b unchanged, and set_seq1() keeps the
+    # b2j index difflib built for it; per thread, as pooled workers may overlap
+    cached = getattr(_line_matchers, 'last', None)
+    if cached is not None and cached[0] == autojunk and cached[1] == lines_b:
+        cached[2].set_seq1(lines_a)
+        return cached[2]
+    matcher = SequenceMatcher(None, lines_a, lines_b, autojunk=autojunk)
+    _line_matchers.last = (autojunk, lines_b, matcher)
+    return matcher
+
+def line_opcodes(lines_a, lines_b, size, fast=False):
+    """Opcodes over whole lines; large inputs patience diff doesn't suit go through
+    the jitted Myers kernel first, as long as they differ in few enough lines"""
+    if _kernels_ready.is_set() and size > MYERS_LINES_MIN_SIZE and not use_patience(lines_b, size):
+        opcodes = myers_code_opcodes(*intern_lines(lines_a, lines_b))
+        if opcodes is not None:
+            return opcodes
+    return line_matcher(lines_a, lines_b, size, fast).get_opcodes()
+
+def compute_line_opcodes(a, b, fast=False):
+    """Character opcodes for a -> b computed line first: lines are matched as whole
+    tokens and only replaced line ranges are compared character by character"""
+    # Edits rarely touch the whole text, set the common head and tail lines aside
+    # (found with C level slice compares) and only match what lies in between
+    prefix = common_prefix_length(a, b)
+    prefix = a.rfind('\n', 0, prefix) + 1
+    suffix = common_suffix_length(a, b, min(len(a), len(b)) - prefix)
+    suffix_start = len(a) - suffix
+    if suffix and suffix_start > 0 and a[suffix_start - 1] != '\n':
+        newline = a.find('\n', suffix_start)
+        suffix = len(a) - newline - 1 if newline != -1 else 0
+    if not prefix and not suffix:
+        return _diff_lines(a, b, fast)
+    
+    opcodes = [('equal', 0, prefix, 0, prefix)] if prefix else []
+    end_a, end_b = len(a) - suffix, len(b) - suffix
+    for tag, i1, i2, j1, j2 in _diff_lines(a[prefix:end_a], b[prefix:end_b], fast):
+        _append_opcode(opcodes, (tag, prefix + i1, prefix + i2, prefix + j1, prefix + j2))
+    if suffix:
+        _append_opcode(opcodes, ('equal', end_a, len(a), end_b, len(b)))
+    return opcodes
+
+def _diff_lines(a, b, fast=False):
+    """compute_line_opcodes without the common head and tail trimming"""
+    lines_a = a.splitlines(keepends=True)
+    lines_b = b.splitlines(keepends=True)
+    offsets_a = list(accumulate(map(len, lines_a), initial=0))
+    offsets_b = list(accumulate(map(len, lines_b), initial=0))
+    
+    opcodes = []
+    for tag, i1, i2, j1, j2 in line_opcodes(lines_a, lines_b, max(len(a), len(b)), fast):
+        a1, a2 = offsets_a[i1], offsets_a[i2]
+        b1, b2 = offsets_b[j1], offsets_b[j2]
+        if tag == 'replace':
+            # Drill into the changed lines for character level detail, word level in fast mode
+            if fast:
+                sub_opcodes = cached_token_opcodes(a[a1:a2], b[b1:b2])
+            else:
+                sub_opcodes = cached_opcodes(a[a1:a2], b[b1:b2])
+            for sub_tag, si1, si2, sj1, sj2 in sub_opcodes:
+                _append_opcode(opcodes, (sub_tag, a1 + si1, a1 + si2, b1 + sj1, b1 + sj2))
+        else:
+            _append_opcode(opcodes, (tag, a1, a2, b1, b2))
+    return opcodes
+
+def _append_opcode(opcodes, opcode):
+    """Append an opcode, merging it into the previous one when both have the same tag"""
+    if opcodes and opcodes[-1][0] == opcode[0]:
+        tag, i1, _, j1, _ = opcodes[-1]
+        opcodes[-1] = (tag, i1, opcode[2], j1, opcode[4])
+    else:
+        opcodes.append(opcode)
+
+NUMPY_AFFIX_MIN_SIZE = 100000  # From this length on common prefixes/suffixes are scanned with numpy
+
+def _first_mismatch(codes_a, codes_b):
+    """Index of the first differing element of two equally long arrays, or their length"""
+    unequal = codes_a != codes_b
+    index = int(unequal.argmax())
+    return index if unequal[index] else len(unequal)
+
+def common_prefix_length(a, b):
+    """Length of the common prefix of a and b, found by bisecting with C level slice compares"""
+    low, high = 0, min(len(a), len(b))
+    if np is not None and high > NUMPY_AFFIX_MIN_SIZE:
+        # One vectorized compare instead of repeatedly copying ever longer slices
+        codes_a, codes_b = _code_arrays(a, b)
+        return _first_mismatch(codes_a[:high], codes_b[:high])
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def common_suffix_length(a, b, limit=None):
+    """Length of the common suffix of a and b, at most limit"""
+    low = 0
+    high = min(len(a), len(b)) if limit is None else limit
+    if np is not None and high > NUMPY_AFFIX_MIN_SIZE:
+        codes_a, codes_b = _code_arrays(a, b)
+        return _first_mismatch(codes_a[len(a) - high:][::-1], codes_b[len(b) - high:][::-1])
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def incremental_opcodes(old_a, old_b, old_opcodes, a, b, max_window=0.5, fast=False):
+    """Update the opcodes of old_a -> old_b for the edited texts a -> b.
+    
+    Opcodes lying completely before or after the edited regions are kept (the
+    ones after are shifted), only the window in between is diffed again.
+    Returns None when the window covers more than max_window of the texts and
+    a full comparison is the better choice."""
+    if not old_opcodes:
+        return None
+    
+    # Edited region of each side, in old coordinates
+    prefix_a = common_prefix_length(old_a, a)
+    prefix_b = common_prefix_length(old_b, b)
+    edit_end_a = len(old_a) - common_suffix_length(old_a, a, min(len(old_a), len(a)) - prefix_a)
+    edit_end_b = len(old_b) - common_suffix_length(old_b, b, min(len(old_b), len(b)) - prefix_b)
+    
+    # Any opcode boundary is a valid cut, keep what the edits don't touch
+    head = 0
+    while head < len(old_opcodes):
+        _, _, i2, _, j2 = old_opcodes[head]
+        if i2 > prefix_a or j2 > prefix_b:
+            break
+        head += 1
+    tail = len(old_opcodes)
+    while tail > head:
+        _, i1, _, j1, _ = old_opcodes[tail - 1]
+        if i1 < edit_end_a or j1 < edit_end_b:
+            break
+        tail -= 1
+    
+    shift_a = len(a) - len(old_a)
+    shift_b = len(b) - len(old_b)
+    start_a, start_b = (old_opcodes[head - 1][2], old_opcodes[head - 1][4]) if head else (0, 0)
+    if tail < len(old_opcodes):
+        end_a = old_opcodes[tail][1] + shift_a
+        end_b = old_opcodes[tail][3] + shift_b
+    else:
+        end_a, end_b = len(a), len(b)
+    if (end_a - start_a) + (end_b - start_b) > max_window * (len(a) + len(b)):
+        return None
+    
+    opcodes = list(old_opcodes[:head])
+    for tag, i1, i2, j1, j2 in compute_line_opcodes(a[start_a:end_a], b[start_b:end_b], fast):
+        _append_opcode(opcodes, (tag, start_a + i1, start_a + i2, start_b + j1, start_b + j2))
+    for tag, i1, i2, j1, j2 in old_opcodes[tail:]:
+        _append_opcode(opcodes, (tag, i1 + shift_a, i2 + shift_a, j1 + shift_b, j2 + shift_b))
+    return opcodes
+
+def hunks_by_line(opcodes, text, left=True):
+    """Split the changed ranges of one side of the opcodes into per line hunks.
+    
+    Returns {line number: [(start in line, length, tag), ...]}; the left side
+    uses the i ranges of delete/replace opcodes, the right side the j ranges
+    of insert/replace opcodes."""
+    lines = text.split('\n')
+    line_starts = list(accumulate((len(line) + 1 for line in lines), initial=0))
+    wanted = ('delete', 'replace') if left else ('insert', 'replace')
+    
+    hunks = {}
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag not in wanted:
+            continue
+        start, end = (i1, i2) if left else (j1, j2)
+        number = bisect_right(line_starts, start) - 1
+        while number < len(lines) and line_starts[number] < end:
+            line_start = line_starts[number]
+            hunk_start = max(start, line_start) - line_start
+            hunk_end = min(end, line_start + len(lines[number])) - line_start
+            if hunk_end > hunk_start:
+                line_hunks = hunks.setdefault(number, [])
+                if line_hunks and line_hunks[-1][2] == tag and sum(line_hunks[-1][:2]) == hunk_start:
+                    # Touching spans of the same tag (e.g. replaces split by an insert on
+                    # the other side) are painted with a single setFormat call
+                    previous_start = line_hunks[-1][0]
+                    line_hunks[-1] = (previous_start, hunk_end - previous_start, tag)
+                else:
+                    line_hunks.append((hunk_start, hunk_end - hunk_start, tag))
+            number += 1
+    return hunks
+
+def opcodes_ratio(opcodes, len_a, len_b):
+    """Similarity ratio computed from already known opcodes (same formula as SequenceMatcher.ratio)"""
+    total = len_a + len_b
+    if not total:
+        return 1.0
+    matches = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == 'equal')
+    return 2.0 * matches / total
+
+UNRELATED_RATIO = 0.01  # Texts that can't reach this similarity aren't diffed in detail
+
+def length_ratio_bound(len_a, len_b):
+    """Upper bound on the similarity ratio from the lengths alone (real_quick_ratio)"""
+    total = len_a + len_b
+    return 2.0 * min(len_a, len_b) / total if total else 1.0
+
+def char_ratio_bound(a, b):
+    """Upper bound on the similarity ratio from character counts (quick_ratio)"""
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    if np is not None and a.isascii() and b.isascii():
+        counts_a = np.bincount(np.frombuffer(a.encode('ascii'), dtype=np.uint8), minlength=128)
+        counts_b = np.bincount(np.frombuffer(b.encode('ascii'), dtype=np.uint8), minlength=128)
+        matches = int(np.minimum(counts_a, counts_b).sum())
+    else:
+        matches = sum((Counter(a) & Counter(b)).values())
+    return 2.0 * matches / total
+
+def _highlight_format(background, foreground, strike_out=False, underline=False):
+    """Build a highlight format; they are shared and never changed afterwards"""
+    text_format = QTextCharFormat()
+    text_format.setBackground(QColor(background))
+    text_format.setForeground(QColor(foreground))
+    if strike_out:
+        text_format.setFontStrikeOut(True)
+    if underline:
+        text_format.setFontUnderline(True)
+    return text_format
+
+# Created once for both highlighters instead of per instance
+DELETION_FORMAT = _highlight_format("#ffebee", "#d32f2f")  # Light red / dark red
+INSERTION_FORMAT = _highlight_format("#e8f5e9", "#2e7d32")  # Light green / dark green
+MODIFICATION_FORMAT = _highlight_format("#fff3e0", "#ef6c00")  # Light orange / dark orange
+DELETION_FORMAT_STRIKE = _highlight_format("#ffebee", "#d32f2f", strike_out=True)
+INSERTION_FORMAT_UNDERLINE = _highlight_format("#e8f5e9", "#2e7d32", underline=True)
+
+_LEFT_TAG_FORMATS = {
+    'delete': DELETION_FORMAT_STRIKE, 'insert': INSERTION_FORMAT, 'replace': MODIFICATION_FORMAT,
+}
+_RIGHT_TAG_FORMATS = {
+    'delete': DELETION_FORMAT, 'insert': INSERTION_FORMAT_UNDERLINE, 'replace': MODIFICATION_FORMAT,
+}
+
+class PaintedHunks(QTextBlockUserData):
+    """The hunks a block was last painted with; block data moves along with the
+    block when lines are inserted or removed above it"""
+    def __init__(self, hunks):
+        super().__init__()
+        self.hunks = hunks
 
 class DiffHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent, other_text="", is_left=True):
+    def __init__(self, parent, is_left=True):
         super().__init__(parent)
-        self.other_text = other_text
+        self.block_hunks = {}  # block number -> [(start, length, tag), ...]
+        self.dirty_blocks = set()  # Blocks whose painted formats are out of date
+        self.blocks_moved = False  # Lines were added or removed since the last set_block_hunks
+        parent.blockCountChanged.connect(self.on_block_count_changed)
         self.enabled = True
         self.is_left = is_left
         
-        # Create formats for different types of differences
-        self.deletion_format = QTextCharFormat()
-        self.deletion_format.setBackground(QColor("#ffebee"))  # Light red
-        self.deletion_format.setForeground(QColor("#d32f2f"))  # Dark red
-        
-        self.insertion_format = QTextCharFormat()
-        self.insertion_format.setBackground(QColor("#e8f5e9"))  # Light green
-        self.insertion_format.setForeground(QColor("#2e7d32"))  # Dark green
+        # Format per tag for this side: deletions in red with strikethrough on the
+        # left, insertions in green with underline on the right, modifications in orange
+        self.tag_formats = _LEFT_TAG_FORMATS if is_left else _RIGHT_TAG_FORMATS
+
+    def set_block_hunks(self, block_hunks):
+        """Store the per block hunks to paint and return the numbers of the blocks
+        whose highlighting changed; rehighlighting is left to the caller"""
+        old_hunks = self.block_hunks
+        self.block_hunks = block_hunks
+        if not self.blocks_moved:
+            # Every block still sits at the number it was painted at
+            return [number for number in old_hunks.keys() | block_hunks.keys()
+                    if old_hunks.get(number) != block_hunks.get(number)]
         
-        self.modification_format = QTextCharFormat()
-        self.modification_format.setBackground(QColor("#fff3e0"))  # Light orange
-        self.modification_format.setForeground(QColor("#ef6c00"))  # Dark orange
+        # Adding or removing lines shifted blocks away from the number they were
+        # painted at, compare against what each block was actually painted with
+        self.blocks_moved = False
+        changed = []
+        get_hunks = block_hunks.get
+        block = self.document().begin()
+        number = 0
+        while block.isValid():
+            data = block.userData()
+            if (data.hunks if data is not None else None) != get_hunks(number):
+                changed.append(number)
+            block = block.next()
+            number += 1
+        return changed
 
-    def set_other_text(self, text):
-        if self.enabled:
-            self.other_text = text
-            self.rehighlight()
+    def on_block_count_changed(self, count):
+        self.blocks_moved = True
+
+    def rehighlight_blocks(self, block_numbers):
+        """Rehighlight only the given blocks instead of the whole document"""
+        document = self.document()
+        # Format changes make the document emit contentsChange/textChanged for every
+        # block; no listener needs them for formats and the layout repaints regardless
+        was_blocked = document.blockSignals(True)
+        try:
+            for number in block_numbers:
+                block = document.findBlockByNumber(number)
+                if block.isValid():
+                    self.rehighlightBlock(block)
+        finally:
+            document.blockSignals(was_blocked)
+
+    def mark_dirty(self, block_numbers):
+        """Remember blocks to rehighlight once they are visible or the event loop is idle"""
+        self.dirty_blocks.update(block_numbers)
+
+    def rehighlight_visible(self, view):
+        """Rehighlight the dirty blocks currently shown in the view"""
+        if not self.dirty_blocks:
+            return
+        viewport = view.viewport()
+        first = view.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = view.cursorForPosition(QPoint(viewport.width() - 1, viewport.height() - 1)).blockNumber()
+        visible = [number for number in range(first, last + 1) if number in self.dirty_blocks]
+        self.dirty_blocks.difference_update(visible)
+        self.rehighlight_blocks(visible)
+
+    def rehighlight_pending(self, limit):
+        """Rehighlight up to limit dirty blocks and return whether any are left"""
+        numbers = [self.dirty_blocks.pop() for _ in range(min(limit, len(self.dirty_blocks)))]
+        self.rehighlight_blocks(numbers)
+        return bool(self.dirty_blocks)
 
     def highlightBlock(self, text):
-        if not self.enabled or not text or not self.other_text:
+        # The diff was computed once for the whole document, just look it up
+        hunks = None
+        if self.enabled and text:
+            hunks = self.block_hunks.get(self.currentBlock().blockNumber())
+        data = self.currentBlockUserData()
+        if data is not None:
+            data.hunks = hunks
+        elif hunks:
+            self.setCurrentBlockUserData(PaintedHunks(hunks))
+        if not hunks:
             return
+        set_format, tag_formats = self.setFormat, self.tag_formats
+        for start, length, tag in hunks:
+            set_format(start, length, tag_formats[tag])
 
-        matcher = SequenceMatcher(None, text, self.other_text)
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            if tag == 'delete':
-                # Show deletions in red with strikethrough
-                fmt = self.deletion_format
-                if self.is_left:
-                    fmt.setFontStrikeOut(True)
-                self.setFormat(i1, i2 - i1, fmt)
-            elif tag == 'insert':
-                # Show insertions in green with underline
-                fmt = self.insertion_format
-                if not self.is_left:
-                    fmt.setFontUnderline(True)
-                self.setFormat(i1, i2 - i1, fmt)
-            elif tag == 'replace':
-                # Show modifications in orange
-                self.setFormat(i1, i2 - i1, self.modification_format)
-
-class ComparisonWorker(QThread):
-    """Worker thread for handling text comparison"""
-    finished = pyqtSignal(list, int)
+class WorkerSignals(QObject):
+    """Signals of a ComparisonWorker, a QRunnable can't define signals itself"""
+    finished = pyqtSignal(list, int, list)
     progress = pyqtSignal(int)
     error = pyqtSignal(str)
-    
-    def __init__(self, text1, text2, max_diff=1000, chunk_size=1000):
+    done = pyqtSignal()  # Always emitted last, once run() is over
+
+class ComparisonWorker(QRunnable):
+    """Thread pool task for handling text comparison"""
+    def __init__(self, text1, text2, max_diff=1000, chunk_size=1000, generation=0, previous=None, fast=False):
         super().__init__()
+        self.signals = WorkerSignals()
+        self.finished = self.signals.finished
+        self.progress = self.signals.progress
+        self.error = self.signals.error
+        self.done = self.signals.done
+        self.generation = generation  # Used by the UI to discard stale results
+        self.previous = previous  # (text1, text2, opcodes) of the last comparison, if any
+        self.fast = fast  # Use autojunk from much smaller inputs on
         # Store original texts without truncation for accurate comparison
         try:
             # Convert texts to strings and limit size
@@ -76,20 +841,19 @@ class ComparisonWorker(QThread):
         self.max_text_length = 5000000  # 5MB limit for safety
         self.max_display_diffs = 100  # Reduced maximum differences to display
         self.batch_size = 25  # Reduced batch size for better stability
+        self.elapsed_ms = 0.0  # Time spent computing the opcodes
     
     def stop(self):
         self._is_running = False
     
-    def safe_text_slice(self, text, start, end):
-        """Safely get a slice of text with error handling"""
+    def run(self):
         try:
-            if not text or start >= len(text):
-                return ""
-            return text[max(0, start):min(len(text), end)]
-        except Exception:
-            return ""
+            self.compare()
+        finally:
+            self.done.emit()
     
-    def run(self):
+    def compare(self):
+        # Tasks superseded while still queued in the pool end right here
         if not self._is_running:
             return
 
@@ -98,50 +862,55 @@ class ComparisonWorker(QThread):
             if not self.text1 and not self.text2:
                 self.error.emit("No text to compare")
                 return
+            
+            # Identical texts need no matcher and have nothing to report
+            if self.text1 == self.text2:
+                self.finished.emit([], 0, [('equal', 0, len(self.text1), 0, len(self.text2))])
+                return
                 
+            # Bail out on unrelated texts before paying for the matcher. Counting
+            # characters takes a pass over both texts, so that bound is only tried
+            # when neither end is shared, edits keep at least one of them equal
+            len1 = len(self.text1)
+            len2 = len(self.text2)
+            if (length_ratio_bound(len1, len2) < UNRELATED_RATIO
+                    or (self.text1[:64] != self.text2[:64] and self.text1[-64:] != self.text2[-64:]
+                        and char_ratio_bound(self.text1, self.text2) < UNRELATED_RATIO)):
+                self.error.emit("Texts are too different for detailed comparison")
+                return
+            
             diff_content = []
             diff_count = 0
             total_diffs = 0
             batch_content = []
             
             try:
-                # Create matcher with better accuracy settings
-                matcher = SequenceMatcher(
-                    isjunk=None,  # Don't consider any characters as junk for better accuracy
-                    a=self.text1,
-                    b=self.text2,
-                    autojunk=False  # Disable autojunk for better accuracy
-                )
-                
-                # First, get an overview of similarity
+                # Compute the opcodes once; everything below reuses this list
                 try:
-                    similarity = matcher.real_quick_ratio()
-                except Exception:
-                    similarity = 0
-                    
-                if similarity < 0.01:
-                    try:
-                        detailed_ratio = matcher.ratio()
-                    except Exception:
-                        detailed_ratio = 0
-                        
-                    if detailed_ratio < 0.01:
-                        self.error.emit("Texts are too different for detailed comparison")
+                    started = time.perf_counter()
+                    opcodes = None
+                    if self.previous:
+                        # Typically only a few characters changed, re-diff just around them
+                        opcodes = incremental_opcodes(*self.previous, self.text1, self.text2, fast=self.fast)
+                    if opcodes is None:
+                        opcodes = compute_line_opcodes(self.text1, self.text2, self.fast)
+                    self.elapsed_ms = (time.perf_counter() - started) * 1000
+                    if not self._is_running:
                         return
-
-                try:
-                    # Get all opcodes first to know total number of differences
-                    opcodes = list(matcher.get_opcodes())
                     total_diffs = sum(1 for tag, _, _, _, _ in opcodes if tag != 'equal')
                 except Exception as e:
                     self.error.emit(f"Error analyzing differences: {str(e)}")
                     return
 
+                similarity = opcodes_ratio(opcodes, len1, len2)
+
                 if total_diffs > self.max_display_diffs:
                     diff_content.append(f"⚠ Found {total_diffs} differences. Showing first {self.max_display_diffs} for performance.")
                     diff_content.append("=" * 50)
                 
-                # Process differences with context
+                # Process differences with context; plain slices are already
+                # bounds safe, only the start before the change needs clamping
+                text1_full, text2_full = self.text1, self.text2
                 for tag, i1, i2, j1, j2 in opcodes:
                     if not self._is_running:
                         return
@@ -154,13 +923,17 @@ class ComparisonWorker(QThread):
                                 diff_content.append(f"\n... {remaining} more differences not shown for performance reasons ...")
                             break
                         
+                        # Emit progress less frequently to reduce overhead
+                        if diff_count % 50 == 0:
+                            self.progress.emit(diff_count)
+                        
                         try:
                             # Get more context around the change (safely)
-                            context_before = self.safe_text_slice(self.text1, max(0, i1-30), i1)
-                            context_after = self.safe_text_slice(self.text1, i2, min(len(self.text1), i2+30))
+                            context_before = text1_full[max(0, i1-30):i1]
+                            context_after = text1_full[i2:i2+30]
                             
                             if tag == 'delete':
-                                deleted_text = self.safe_text_slice(self.text1, i1, i2)
+                                deleted_text = text1_full[i1:i2]
                                 if len(deleted_text) > 100:
                                     deleted_text = f"{deleted_text[:97]}..."
                                 batch_content.append(
@@ -169,7 +942,7 @@ class ComparisonWorker(QThread):
                                 )
                                 
                             elif tag == 'insert':
-                                inserted_text = self.safe_text_slice(self.text2, j1, j2)
+                                inserted_text = text2_full[j1:j2]
                                 if len(inserted_text) > 100:
                                     inserted_text = f"{inserted_text[:97]}..."
                                 batch_content.append(
@@ -178,8 +951,8 @@ class ComparisonWorker(QThread):
                                 )
                                 
                             elif tag == 'replace':
-                                text1 = self.safe_text_slice(self.text1, i1, i2)
-                                text2 = self.safe_text_slice(self.text2, j1, j2)
+                                text1 = text1_full[i1:i2]
+                                text2 = text2_full[j1:j2]
                                 if len(text1) > 50: text1 = f"{text1[:47]}..."
                                 if len(text2) > 50: text2 = f"{text2[:47]}..."
                                 batch_content.append(
@@ -197,10 +970,6 @@ class ComparisonWorker(QThread):
                         except Exception as e:
                             print(f"Error processing diff chunk: {e}")
                             continue
-                    
-                    # Emit progress less frequently to reduce overhead
-                    if diff_count % 50 == 0 and self._is_running:
-                        self.progress.emit(diff_count)
                 
                 # Add any remaining batch content
                 if batch_content and self._is_running:
@@ -209,22 +978,24 @@ class ComparisonWorker(QThread):
                 # Add detailed summary at the end
                 if total_diffs > 0 and self._is_running:
                     try:
-                        total_chars1 = len(self.text1)
-                        total_chars2 = len(self.text2)
+                        total_chars1 = len1
+                        total_chars2 = len2
                         char_diff = abs(total_chars1 - total_chars2)
                         
-                        # Calculate more accurate similarity
-                        final_similarity = matcher.ratio() * 100
+                        final_similarity = similarity * 100
                         
                         # Calculate word-based differences (safely)
                         try:
+                            # Only the counts are reported, one intersection gives both
+                            # without building the two difference sets
                             words1 = set(self.text1.split())
                             words2 = set(self.text2.split())
-                            unique_words1 = words1 - words2
-                            unique_words2 = words2 - words1
+                            shared_words = len(words1 & words2)
+                            unique_words1 = len(words1) - shared_words
+                            unique_words2 = len(words2) - shared_words
                         except Exception:
-                            unique_words1 = set()
-                            unique_words2 = set()
+                            unique_words1 = 0
+                            unique_words2 = 0
                         
                         summary = [
                             "",
@@ -233,15 +1004,15 @@ class ComparisonWorker(QThread):
                             f"Differences shown: {min(diff_count, self.max_display_diffs)}",
                             f"Character difference: {char_diff} ({'more' if total_chars2 > total_chars1 else 'fewer'} in second text)",
                             f"Overall similarity: {final_similarity:.2f}%",
-                            f"Unique words in first text: {len(unique_words1)}",
-                            f"Unique words in second text: {len(unique_words2)}"
+                            f"Unique words in first text: {unique_words1}",
+                            f"Unique words in second text: {unique_words2}"
                         ]
                         diff_content.extend(summary)
                     except Exception as e:
                         print(f"Error creating summary: {e}")
                 
                 if self._is_running and not self._error_occurred:
-                    self.finished.emit(diff_content, total_diffs)
+                    self.finished.emit(diff_content, total_diffs, opcodes)
                     
             except MemoryError:
                 self._error_occurred = True
@@ -253,16 +1024,15 @@ class ComparisonWorker(QThread):
         except Exception as e:
             self._error_occurred = True
             self.error.emit(f"Fatal error during comparison: {str(e)}")
-        
-    def __del__(self):
-        """Cleanup when the worker is destroyed"""
-        try:
-            self.stop()
-            self.wait()
-        except Exception:
-            pass
 
 class StringComparisonApp(QMainWindow):
+    # Status label stylesheets, built once so Qt only reparses CSS when the state changes
+    _STATUS_NEUTRAL = "padding: 10px; border-radius: 5px; background-color: #e3f2fd;"
+    _STATUS_EQUAL = "padding: 10px; border-radius: 5px; background-color: #c8e6c9;"
+    _STATUS_DIFF = "padding: 10px; border-radius: 5px; background-color: #ffcdd2;"
+    _RESULT_CACHE_SIZE = 16  # Finished comparisons kept for text pairs that come back
+    _INLINE_MAX_SIZE = 4096  # Combined length up to which comparisons skip the thread pool
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Advanced String Comparison Tool")
@@ -270,11 +1040,22 @@ class StringComparisonApp(QMainWindow):
         
         # Initialize state variables
         self.comparison_worker = None
+        self.active_workers = set()  # Keeps pooled workers alive until they are done
+        self.comparison_generation = 0  # Bumped for every new comparison request
+        self.shared_opcodes = []  # Opcodes of the latest finished comparison
+        self.shared_texts = ("", "")  # The texts those opcodes belong to
+        # Compile on a thread of its own, so it doesn't hold up the window or take
+        # a pool slot comparisons need
+        threading.Thread(target=warm_up_kernels, daemon=True).start()
         self.update_pending = False
         self.max_text_size = 1000000  # 1MB limit for highlighting
         self.last_comparison_time = 0
-        self.comparison_cooldown = 1500  # 1.5 second cooldown
+        self._last_diff_ms = 150.0  # Duration of the last diff, drives the debounce interval
         self.is_processing = False
+        self._last_sig = None  # (hash(text1), hash(text2)) of the last comparison
+        self._result_cache = OrderedDict()  # result_key() -> (diff_content, diff_count, opcodes)
+        self._plain_texts = ["", ""]  # Mirror of each editor's text, kept in sync by edits
+        self._word_totals = [0, 0]  # Running word count of each editor
         
         # Create main widget and layout
         main_widget = QWidget()
@@ -301,6 +1082,12 @@ class StringComparisonApp(QMainWindow):
             legend_layout.addWidget(legend_label)
         
         legend_layout.addStretch()
+        
+        # Fast mode lets difflib drop popular elements on much smaller inputs
+        self.fast_mode = QCheckBox("Fast mode")
+        self.fast_mode.setToolTip("Faster on large texts, but some changes may show as replacements")
+        self.fast_mode.toggled.connect(self.on_fast_mode_toggled)
+        legend_layout.addWidget(self.fast_mode)
         layout.addLayout(legend_layout)
         
         # Create horizontal layout for text editors
@@ -311,7 +1098,9 @@ class StringComparisonApp(QMainWindow):
         self.left_label = QLabel("Original Text")
         self.left_label.setStyleSheet("font-weight: bold; font-size: 14px;")
         self.text1 = self.create_text_edit()
-        self.text1.textChanged.connect(self.schedule_update)
+        self.text1.document().contentsChange.connect(
+            lambda position, removed, added: self.on_contents_change(0, position, removed, added)
+        )
         self.word_count1 = QLabel("Words: 0  Characters: 0")
         
         left_layout.addWidget(self.left_label)
@@ -323,7 +1112,9 @@ class StringComparisonApp(QMainWindow):
         self.right_label = QLabel("Modified Text")
         self.right_label.setStyleSheet("font-weight: bold; font-size: 14px;")
         self.text2 = self.create_text_edit()
-        self.text2.textChanged.connect(self.schedule_update)
+        self.text2.document().contentsChange.connect(
+            lambda position, removed, added: self.on_contents_change(1, position, removed, added)
+        )
         self.word_count2 = QLabel("Words: 0  Characters: 0")
         
         right_layout.addWidget(self.right_label)
@@ -338,22 +1129,32 @@ class StringComparisonApp(QMainWindow):
         self.highlighter1 = DiffHighlighter(self.text1.document(), is_left=True)
         self.highlighter2 = DiffHighlighter(self.text2.document(), is_left=False)
         
+        # Blocks in view are painted right away, the rest a batch at a time when idle
+        self.dirty_timer = QTimer()
+        self.dirty_timer.setSingleShot(True)
+        self.dirty_timer.timeout.connect(self.paint_dirty_blocks)
+        self.text1.verticalScrollBar().valueChanged.connect(self.paint_visible_highlights)
+        self.text2.verticalScrollBar().valueChanged.connect(self.paint_visible_highlights)
+        
         # Add editors layout to main layout
         layout.addLayout(editors_layout)
         
-        # Create detailed diff view
-        self.diff_view = self.create_text_edit(font_size=10)
+        # Create detailed diff view; it only ever shows plain text, which
+        # QPlainTextEdit lays out line by line much cheaper than QTextEdit
+        self.diff_view = QPlainTextEdit()
+        self.diff_view.setFont(QFont("Consolas", 10))
         self.diff_view.setReadOnly(True)
         self.diff_view.setMaximumHeight(150)
         self.diff_view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        self.diff_view.setLineWrapMode(QTextEdit.NoWrap)  # Prevent line wrapping
+        self.diff_view.setLineWrapMode(QPlainTextEdit.NoWrap)  # Prevent line wrapping
         layout.addWidget(QLabel("Detailed Changes:"))
         layout.addWidget(self.diff_view)
         
         # Create status area
         self.status_label = QLabel()
         self.status_label.setAlignment(Qt.AlignCenter)
-        self.status_label.setStyleSheet("padding: 10px; border-radius: 5px; background-color: #e3f2fd;")
+        self._last_status = None
+        self.set_status_style(self._STATUS_NEUTRAL)
         layout.addWidget(self.status_label)
         
         # Create update timer
@@ -361,6 +1162,12 @@ class StringComparisonApp(QMainWindow):
         self.update_timer.setSingleShot(True)
         self.update_timer.timeout.connect(self.update_comparison)
         
+        # Highlighting runs from the event loop, so only the newest result gets painted
+        self._pending_highlights = None  # (text1, text2, opcodes) waiting to be painted
+        self.highlight_timer = QTimer()
+        self.highlight_timer.setSingleShot(True)
+        self.highlight_timer.timeout.connect(self.apply_pending_highlights)
+        
         # Style the window
         self.setStyleSheet("""
             QMainWindow {
@@ -380,29 +1187,37 @@ class StringComparisonApp(QMainWindow):
             }
         """)
 
+    def update_interval(self):
+        """Debounce interval in ms: quick diffs run almost immediately, slow ones wait longer"""
+        return max(50, min(750, int(self._last_diff_ms * 5)))
+
     def schedule_update(self):
         """Schedule an update with debouncing and safety checks"""
         if self.is_processing:
             return
             
-        if not self.update_timer.isActive():
-            self.update_timer.start(750)  # Increased delay for better performance
+        # Restart on every keystroke, unless the update is about to fire anyway
+        if not self.update_timer.isActive() or self.update_timer.remainingTime() > 50:
+            self.update_timer.start(self.update_interval())
         self.update_pending = True
 
-    def standardize_text(self, text):
-        """Standardize text formatting regardless of input source"""
-        # Remove any special Unicode whitespace characters
-        text = ' '.join(text.split())
-        return text
+    def on_fast_mode_toggled(self, checked):
+        """Redo the comparison from scratch with the new matching mode"""
+        self._last_sig = None
+        self.shared_opcodes = []
+        self.shared_texts = ("", "")
+        self.update_pending = True
+        self.update_timer.start(self.update_interval())
 
     def update_comparison(self):
         if not self.update_pending or self.is_processing:
             return
             
         current_time = QDateTime.currentMSecsSinceEpoch()
-        if current_time - self.last_comparison_time < self.comparison_cooldown:
+        cooldown = self.update_interval() * 2
+        if current_time - self.last_comparison_time < cooldown:
             # Reschedule update
-            self.update_timer.start(self.comparison_cooldown)
+            self.update_timer.start(cooldown)
             return
             
         self.update_pending = False
@@ -411,42 +1226,58 @@ class StringComparisonApp(QMainWindow):
         
         try:
             # Get text content
-            text1 = self.text1.toPlainText()
-            text2 = self.text2.toPlainText()
+            # The mirrors kept by on_contents_change equal toPlainText() without
+            # copying the documents out of Qt again
+            text1, text2 = self._plain_texts
             
             # Basic validation
             if len(text1) == 0 and len(text2) == 0:
                 self.status_label.setText("Enter text to compare")
+                self._last_sig = None
                 self.is_processing = False
                 return
             
+            # Nothing changed since the last comparison
+            sig = (hash(text1), hash(text2))
+            if sig == self._last_sig:
+                return
+            self._last_sig = sig
+            
+            # Identical texts need no matcher at all
+            if text1 == text2:
+                self.comparison_generation += 1
+                self.stop_current_worker()
+                if len(text1) < self.max_text_size:
+                    self.update_word_counts(text1, text2)
+                # Shown like the worker's identical result, with the same header;
+                # update_diff_view skips its work while is_processing is set
+                self.is_processing = False
+                self.apply_result(text1, text2, [], 0, compute_opcodes(text1, text2))
+                return
+            
             # Update UI for processing state
             self.status_label.setText("Processing comparison...")
-            self.status_label.setStyleSheet(
-                "padding: 10px; border-radius: 5px; background-color: #e3f2fd;"
-            )
+            self.set_status_style(self._STATUS_NEUTRAL)
             
             # Safely stop previous worker
             self.stop_current_worker()
+            self.comparison_generation += 1
             
-            # Create new worker
-            self.comparison_worker = ComparisonWorker(
-                text1, 
-                text2, 
-                max_diff=1000,
-                chunk_size=1000
-            )
-            
-            # Connect signals with proper cleanup
-            self.connect_worker_signals()
-            
-            # Start comparison
-            self.comparison_worker.start()
+            # Undo/redo or typing and deleting the same text lands on pairs compared
+            # moments ago; hand their result over like a worker would, without one
+            key = self.result_key(text1, text2, self.fast_mode.isChecked())
+            cached = self._result_cache.get(key)
+            if cached is not None:
+                self._result_cache.move_to_end(key)
+                generation = self.comparison_generation
+                QTimer.singleShot(0, lambda: self.on_cached_result(generation, text1, text2, cached))
+            else:
+                self.start_worker(text1, text2)
             
-            # Update word counts and highlighters only for smaller texts
+            # Update word counts only for smaller texts, the highlighters
+            # follow once the worker delivers the opcodes
             if len(text1) < self.max_text_size and len(text2) < self.max_text_size:
                 self.update_word_counts(text1, text2)
-                self.update_highlighters(text1, text2)
             else:
                 # Disable highlighting for large texts
                 self.highlighter1.enabled = False
@@ -458,15 +1289,37 @@ class StringComparisonApp(QMainWindow):
         finally:
             self.is_processing = False
     
+    def start_worker(self, text1, text2):
+        """Compare the texts in a worker, diffing incrementally from the last result"""
+        self.comparison_worker = ComparisonWorker(
+            text1, 
+            text2, 
+            max_diff=1000,
+            chunk_size=1000,
+            generation=self.comparison_generation,
+            previous=(*self.shared_texts, self.shared_opcodes),
+            fast=self.fast_mode.isChecked()
+        )
+        
+        # Connect signals with proper cleanup
+        self.connect_worker_signals()
+        
+        self.active_workers.add(self.comparison_worker)
+        if len(text1) + len(text2) <= self._INLINE_MAX_SIZE:
+            # A few KB diff in well under a frame, faster than the hop to a pool
+            # thread and back; run on the GUI thread once this update returned
+            QTimer.singleShot(0, self.comparison_worker.run)
+        else:
+            # Start comparison on a pooled thread instead of creating one per update
+            QThreadPool.globalInstance().start(self.comparison_worker)
+    
     def stop_current_worker(self):
-        """Safely stop the current worker thread"""
-        if self.comparison_worker and self.comparison_worker.isRunning():
+        """Ask the current worker to stop without blocking the GUI thread"""
+        if self.comparison_worker:
             try:
+                # It checks the flag between steps and its results carry an old
+                # generation, so it can finish on its own
                 self.comparison_worker.stop()
-                self.comparison_worker.wait(1000)  # Wait longer for cleanup
-                if self.comparison_worker.isRunning():
-                    self.comparison_worker.terminate()
-                    self.comparison_worker.wait()
             except Exception as e:
                 print(f"Error stopping worker: {e}")
     
@@ -483,28 +1336,89 @@ class StringComparisonApp(QMainWindow):
                     pass  # Ignore disconnection errors
                 
             # Connect new signals
-            self.comparison_worker.finished.connect(
-                lambda diff_content, diff_count: self.update_diff_view(
-                    diff_content, diff_count, self.text1.toPlainText(), self.text2.toPlainText()
+            worker = self.comparison_worker
+            worker.finished.connect(
+                lambda diff_content, diff_count, opcodes: self.on_worker_finished(
+                    worker, diff_content, diff_count, opcodes
                 )
             )
-            self.comparison_worker.error.connect(self.handle_comparison_error)
+            worker.error.connect(lambda message: self.on_worker_error(worker, message))
+            worker.done.connect(lambda: self.active_workers.discard(worker))
             self.comparison_worker.progress.connect(self.update_progress)
         except Exception as e:
             print(f"Error connecting signals: {e}")
 
+    def on_worker_finished(self, worker, diff_content, diff_count, opcodes):
+        """Apply the results of a worker unless a newer comparison superseded it"""
+        if worker.generation != self.comparison_generation:
+            return
+        self._last_diff_ms = worker.elapsed_ms
+        key = self.result_key(worker.text1, worker.text2, worker.fast)
+        self._result_cache[key] = (diff_content, diff_count, opcodes)
+        if len(self._result_cache) > self._RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        self.apply_result(worker.text1, worker.text2, diff_content, diff_count, opcodes)
+
+    def on_cached_result(self, generation, text1, text2, result):
+        """Apply a remembered result unless a newer comparison superseded it"""
+        if generation == self.comparison_generation:
+            self.apply_result(text1, text2, *result)
+
+    def apply_result(self, text1, text2, diff_content, diff_count, opcodes):
+        """Show a finished comparison and queue its highlighting"""
+        self.shared_opcodes = opcodes
+        self.shared_texts = (text1, text2)
+        self.update_diff_view(diff_content, diff_count, text1, text2)
+        self.schedule_highlights(text1, text2, opcodes)
+
+    @staticmethod
+    def result_key(text1, text2, fast):
+        """Cache key of a comparison; str caches its hash, so this costs nothing after
+        the first call, and the lengths guard against hash collisions"""
+        return (hash(text1), hash(text2), len(text1), len(text2), fast)
+
+    def schedule_highlights(self, text1, text2, opcodes):
+        """Queue opcodes for painting, replacing any result that wasn't painted yet"""
+        self._pending_highlights = (text1, text2, opcodes)
+        self.highlight_timer.start(0)
+
+    def apply_pending_highlights(self):
+        """Paint the newest queued opcodes into both editors"""
+        if self._pending_highlights is None:
+            return
+        text1, text2, opcodes = self._pending_highlights
+        self._pending_highlights = None
+        
+        # Offsets only fit the documents if they weren't edited in the meantime
+        if (len(text1) < self.max_text_size and len(text2) < self.max_text_size
+                and text1 == self._plain_texts[0] and text2 == self._plain_texts[1]):
+            self.is_processing = True  # Formatting changes must not schedule an update
+            try:
+                self.update_highlighters(text1, text2, opcodes)
+            finally:
+                self.is_processing = False
+
+    def on_worker_error(self, worker, error_message):
+        """Report a worker error unless a newer comparison superseded it"""
+        if worker.generation != self.comparison_generation:
+            return
+        self.handle_comparison_error(error_message)
+
     def handle_comparison_error(self, error_message):
         """Handle comparison errors gracefully"""
         self.is_processing = False
         self.status_label.setText(f"⚠ {error_message}")
-        self.status_label.setStyleSheet(
-            "padding: 10px; border-radius: 5px; background-color: #ffcdd2;"
-        )
+        self.set_status_style(self._STATUS_DIFF)
         
-        # Clear the diff view
-        self.diff_view.clear()
-        self.diff_view.append("An error occurred during comparison. Please try again with shorter text or wait a moment.")
+        # Replace the diff view content
+        self.diff_view.setPlainText("An error occurred during comparison. Please try again with shorter text or wait a moment.")
         
+    def set_status_style(self, style):
+        """Apply a status stylesheet unless it is already the active one"""
+        if style is not self._last_status:
+            self.status_label.setStyleSheet(style)
+            self._last_status = style
+
     def update_progress(self, count):
         """Update the status with progress information"""
         if count % 100 == 0:  # Update every 100 differences
@@ -519,69 +1433,62 @@ class StringComparisonApp(QMainWindow):
                 
             self.is_processing = True
             
-            # Clear the view first
-            self.diff_view.clear()
-            
+            # Build the whole text first and hand it to Qt in a single call,
+            # every append() would trigger its own layout pass
+            header = []
             try:
                 # Add a header with basic stats
                 total_chars1 = len(text1) if text1 else 0
                 total_chars2 = len(text2) if text2 else 0
-                self.diff_view.append(f"Text 1 length: {total_chars1:,} characters")
-                self.diff_view.append(f"Text 2 length: {total_chars2:,} characters")
-                self.diff_view.append("=" * 50 + "\n")
+                header.append(f"Text 1 length: {total_chars1:,} characters")
+                header.append(f"Text 2 length: {total_chars2:,} characters")
+                header.append("=" * 50 + "\n")
             except Exception as e:
                 print(f"Error adding header: {e}")
             
+            self.diff_view.setUpdatesEnabled(False)
             try:
-                # Set plain text for better performance with large content
-                self.diff_view.setPlainText("")
-                
-                # Join text in chunks to prevent memory issues
+                # Join text in chunks to prevent memory issues, collecting the
+                # chunks in a list as += would copy the growing text every time
                 chunk_size = 1000
-                combined_text = ""
-                
+                parts = ["\n".join(header), "\n"]
+                combined_length = 0
+
                 for i in range(0, len(diff_content), chunk_size):
-                    chunk = diff_content[i:i + chunk_size]
-                    combined_text += "\n".join(chunk) + "\n"
-                    
-                    if len(combined_text) > 1000000:  # Limit total text size
-                        combined_text += "\n... Text truncated for performance ..."
+                    chunk = "\n".join(diff_content[i:i + chunk_size]) + "\n"
+                    parts.append(chunk)
+                    combined_length += len(chunk)
+
+                    if combined_length > 1000000:  # Limit total text size
+                        parts.append("\n... Text truncated for performance ...")
                         break
-                
-                # Use insertPlainText for better performance
-                cursor = self.diff_view.textCursor()
-                cursor.movePosition(cursor.End)
-                cursor.insertText(combined_text)
-                
-                # Move cursor to start for better visibility
-                cursor.movePosition(cursor.Start)
-                self.diff_view.setTextCursor(cursor)
+
+                # setPlainText also leaves the cursor at the start
+                self.diff_view.setPlainText("".join(parts))
             except Exception as e:
                 print(f"Error setting diff content: {e}")
-                self.diff_view.append("Error displaying full comparison results")
+                self.diff_view.setPlainText("Error displaying full comparison results")
+            finally:
+                self.diff_view.setUpdatesEnabled(True)
             
             try:
                 # Update status with appropriate styling
                 if not text1 and not text2:
                     self.status_label.setText("Enter text to compare")
-                    self.status_label.setStyleSheet(
-                        "padding: 10px; border-radius: 5px; background-color: #e3f2fd;"
-                    )
+                    self.set_status_style(self._STATUS_NEUTRAL)
                 elif text1 == text2:
                     self.status_label.setText("✓ Texts are identical")
-                    self.status_label.setStyleSheet(
-                        "padding: 10px; border-radius: 5px; background-color: #c8e6c9;"
-                    )
+                    self.set_status_style(self._STATUS_EQUAL)
                 else:
                     status_text = f"⚠ Found {diff_count:,} differences"
                     if diff_count > 100:  # max_display_diffs
                         status_text += " (showing first 100 for performance)"
                     status_text += f" - {self.calculate_similarity_message(text1, text2)}"
+                    if self.fast_mode.isChecked():
+                        status_text += " (fast mode: some changes may show as replacements)"
                     
                     self.status_label.setText(status_text)
-                    self.status_label.setStyleSheet(
-                        "padding: 10px; border-radius: 5px; background-color: #ffcdd2;"
-                    )
+                    self.set_status_style(self._STATUS_DIFF)
             except Exception as e:
                 print(f"Error updating status: {e}")
                 
@@ -597,10 +1504,9 @@ class StringComparisonApp(QMainWindow):
             if not text1 or not text2:
                 return "One text is empty"
                 
-            # Use quick ratio for better performance
+            # Reuse the opcodes of the finished comparison instead of running another matcher
             try:
-                matcher = SequenceMatcher(None, text1[:10000], text2[:10000])  # Limit text size for quick calculation
-                similarity = matcher.quick_ratio() * 100
+                similarity = opcodes_ratio(self.shared_opcodes, len(text1), len(text2)) * 100
             except Exception:
                 return "Unable to calculate similarity"
             
@@ -618,57 +1524,24 @@ class StringComparisonApp(QMainWindow):
             return "Unable to calculate similarity"
 
     def create_text_edit(self, font_size=11):
-        """Create a QTextEdit with proper scroll behavior"""
+        """Create a QTextEdit with the shared font settings"""
         text_edit = QTextEdit()
         text_edit.setFont(QFont("Consolas", font_size))
         text_edit.setAcceptRichText(False)
         
-        # Get the vertical scrollbar
-        scrollbar = text_edit.verticalScrollBar()
-        
-        # Store the current cursor position and selection
-        last_cursor_pos = 0
-        last_anchor_pos = 0
-        
-        def store_cursor_pos():
-            nonlocal last_cursor_pos, last_anchor_pos
-            cursor = text_edit.textCursor()
-            last_cursor_pos = cursor.position()
-            last_anchor_pos = cursor.anchor()
-        
-        # Prevent automatic scrolling by maintaining scroll position and cursor
-        def maintain_scroll(value):
-            if not text_edit.hasFocus():
-                scrollbar.setValue(value)
-                # Restore cursor position and selection
-                cursor = text_edit.textCursor()
-                text_length = len(text_edit.toPlainText())
-                
-                # Ensure positions are within valid range
-                pos = min(last_cursor_pos, text_length)
-                anchor = min(last_anchor_pos, text_length)
-                
-                cursor.setPosition(anchor)
-                cursor.setPosition(pos, cursor.KeepAnchor)
-                text_edit.setTextCursor(cursor)
-        
-        # Connect signals
-        scrollbar.valueChanged.connect(maintain_scroll)
-        text_edit.cursorPositionChanged.connect(store_cursor_pos)
-        
+        # No scroll/cursor restoring callbacks here: nothing scrolls an editor
+        # programmatically except the user, and a valueChanged handler calling
+        # setValue() fed back into itself on every scroll tick
         return text_edit
 
     def update_word_counts(self, text1, text2):
         """Update word counts in the UI"""
         try:
-            # Limit text size for word counting
-            text1 = text1[:1000000] if text1 else ""
-            text2 = text2[:1000000] if text2 else ""
+            # Limit text size for the character display
+            chars1 = min(len(text1), 1000000)
+            chars2 = min(len(text2), 1000000)
             
-            words1 = len(text1.split()) if text1.strip() else 0
-            chars1 = len(text1)
-            words2 = len(text2.split()) if text2.strip() else 0
-            chars2 = len(text2)
+            words1, words2 = self._word_totals
             
             self.word_count1.setText(f"Words: {words1:,}  Characters: {chars1:,}")
             self.word_count2.setText(f"Words: {words2:,}  Characters: {chars2:,}")
@@ -677,17 +1550,94 @@ class StringComparisonApp(QMainWindow):
             self.word_count1.setText("Words: -  Characters: -")
             self.word_count2.setText("Words: -  Characters: -")
 
-    def update_highlighters(self, text1, text2):
-        """Update highlighters in the UI"""
+    def on_contents_change(self, side, position, removed, added):
+        """Keep the running word count of one editor up to date by recounting only
+        the words around the edited range, and schedule a comparison if the text
+        really changed (textChanged also fires for format only changes)"""
+        try:
+            document = (self.text1, self.text2)[side].document()
+            old = self._plain_texts[side]
+            length = document.characterCount() - 1  # Without the final paragraph separator
+            if position + removed > len(old) or length != len(old) - removed + added:
+                # Whole document replaced (setPlainText) or positions that don't map
+                # onto the mirror (characters outside the BMP), recount everything
+                text = document.toPlainText()
+                self._plain_texts[side] = text
+                self._word_totals[side] = count_words(text)
+                self.schedule_update()
+                return
+            
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(position + added, QTextCursor.KeepAnchor)
+            inserted = cursor.selectedText().translate(_PLAIN_TEXT_TABLE)
+            if inserted == old[position:position + removed]:
+                return  # Only formats changed, nothing to compare again
+            
+            # Words touching the edit can merge or split, so widen it to whole words
+            start = position
+            while start > 0 and not old[start - 1].isspace():
+                start -= 1
+            end = position + removed
+            while end < len(old) and not old[end].isspace():
+                end += 1
+            new = old[:position] + inserted + old[position + removed:]
+            self._plain_texts[side] = new
+            # added counts UTF-16 units, characters outside the BMP take two
+            self._word_totals[side] += (count_words(new[start:end - removed + len(inserted)])
+                                        - count_words(old[start:end]))
+            self.schedule_update()
+        except Exception as e:
+            print(f"Error updating running word count: {e}")
+
+    def update_highlighters(self, text1, text2, opcodes):
+        """Update highlighters in the UI from the shared opcodes of text1 -> text2"""
         try:
+            # Formats went stale while highlighting was off, redo everything then
+            was_enabled = self.highlighter1.enabled and self.highlighter2.enabled
             self.highlighter1.enabled = len(text1) < self.max_text_size
             self.highlighter2.enabled = len(text2) < self.max_text_size
             if self.highlighter1.enabled and self.highlighter2.enabled:
-                self.highlighter1.set_other_text(text2)
-                self.highlighter2.set_other_text(text1)
+                changed1 = self.highlighter1.set_block_hunks(hunks_by_line(opcodes, text1, left=True))
+                changed2 = self.highlighter2.set_block_hunks(hunks_by_line(opcodes, text2, left=False))
+                if was_enabled:
+                    # Only blocks whose hunks changed need another pass
+                    self.highlighter1.mark_dirty(changed1)
+                    self.highlighter2.mark_dirty(changed2)
+                else:
+                    self.highlighter1.mark_dirty(range(self.text1.document().blockCount()))
+                    self.highlighter2.mark_dirty(range(self.text2.document().blockCount()))
+                self.paint_visible_highlights()
+                self.dirty_timer.start(0)
         except Exception as e:
             print(f"Error updating highlighters: {e}")
 
+    def paint_visible_highlights(self, *args):
+        """Rehighlight the out of date blocks that are on screen"""
+        was_processing = self.is_processing
+        self.is_processing = True  # Formatting changes must not schedule an update
+        try:
+            self.highlighter1.rehighlight_visible(self.text1)
+            self.highlighter2.rehighlight_visible(self.text2)
+        except Exception as e:
+            print(f"Error painting visible highlights: {e}")
+        finally:
+            self.is_processing = was_processing
+
+    def paint_dirty_blocks(self):
+        """Rehighlight a batch of off screen blocks, rescheduling until all are done"""
+        was_processing = self.is_processing
+        self.is_processing = True
+        try:
+            left1 = self.highlighter1.rehighlight_pending(200)
+            left2 = self.highlighter2.rehighlight_pending(200)
+            if left1 or left2:
+                self.dirty_timer.start(0)
+        except Exception as e:
+            print(f"Error painting highlights: {e}")
+        finally:
+            self.is_processing = was_processing
+
 def main():
     app = QApplication(sys.argv)
     window = StringComparisonApp()
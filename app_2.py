@@ -1,10 +1,166 @@
 import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                           QHBoxLayout, QTextEdit, QLabel, QPushButton, 
+                           QHBoxLayout, QTextEdit, QPlainTextEdit, QLabel, QPushButton, 
                            QProgressBar, QFrame, QScrollBar, QMessageBox)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QColor, QPalette, QFont, QIcon
-import difflib
+from PyQt5.QtCore import Qt, QTimer, QElapsedTimer, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QColor, QPalette, QFont, QIcon, QTextCursor, QTextCharFormat
+from collections import Counter, OrderedDict
+from functools import partial
+from itertools import accumulate
+
+try:
+    # Drop-in C implementation of difflib's matcher, same opcodes much faster
+    from cdifflib import CSequenceMatcher as SequenceMatcher
+except ImportError:
+    from difflib import SequenceMatcher
+
+try:
+    # C++ bit-parallel LCS, exact where difflib's autojunk gives up on long lines
+    from rapidfuzz.distance import Indel
+except ImportError:
+    Indel = None
+
+HIGHLIGHT_MAX_SIZE = 262144  # Combined length above which the diff panes stay unformatted
+ESTIMATE_MIN_SIZE = 20000  # Combined length from which a quick estimate is shown while diffing
+INDEL_MAX_CELLS = 1 << 28  # Largest len(a) * len(b) handed to Indel, its opcodes need that many bits
+SMALL_EDIT_SIZE = 64  # Edits touching fewer characters than this count as small
+SMALL_DOC_SIZE = 16384  # Combined input length below which small edits update quickly
+SMALL_EDIT_DELAY = 150  # Debounce in ms after a small edit
+LARGE_EDIT_DELAY = 1000  # Debounce in ms after a large edit or in a large document
+MAX_UPDATE_DELAY = 2000  # Longest continuous typing may defer a comparison, in ms
+
+def diff_opcodes(a, b):
+    """Opcodes for a -> b, matching whole lines first and comparing only the
+    replaced lines character by character"""
+    lines_a = a.splitlines(keepends=True)
+    lines_b = b.splitlines(keepends=True)
+    offsets_a = list(accumulate(map(len, lines_a), initial=0))
+    offsets_b = list(accumulate(map(len, lines_b), initial=0))
+
+    opcodes = []
+    line_matcher = SequenceMatcher(None, lines_a, lines_b, autojunk=False)
+    for tag, i1, i2, j1, j2 in line_matcher.get_opcodes():
+        a1, a2 = offsets_a[i1], offsets_a[i2]
+        b1, b2 = offsets_b[j1], offsets_b[j2]
+        if tag != 'replace':
+            opcodes.append((tag, a1, a2, b1, b2))
+            continue
+        if Indel is not None and (a2 - a1) * (b2 - b1) <= INDEL_MAX_CELLS:
+            char_opcodes = Indel.opcodes(a[a1:a2], b[b1:b2]).as_list()
+        else:
+            hunk_a, hunk_b = a[a1:a2], b[b1:b2]
+            if hunk_a.isascii() and hunk_b.isascii():
+                # Small ints hash cheaper than 1-char strings when the matcher
+                # indexes b, and ASCII byte offsets are character offsets
+                hunk_a, hunk_b = hunk_a.encode('ascii'), hunk_b.encode('ascii')
+            char_opcodes = SequenceMatcher(None, hunk_a, hunk_b).get_opcodes()
+        for sub_tag, si1, si2, sj1, sj2 in char_opcodes:
+            opcodes.append((sub_tag, a1 + si1, a1 + si2, b1 + sj1, b1 + sj2))
+    return opcodes
+
+# Every ASCII character str.split() treats as whitespace
+_ASCII_WHITESPACE = str.maketrans('', '', ' \t\n\v\f\r\x1c\x1d\x1e\x1f')
+
+def strip_whitespace(text):
+    """Remove all whitespace. translate() skips the word list split() builds, but
+    it only beats split() on ASCII text"""
+    if text.isascii():
+        return text.translate(_ASCII_WHITESPACE)
+    return ''.join(text.split())
+
+def utf16_length(text):
+    """Length of text in UTF-16 code units, the unit QTextCursor positions count in"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+def common_prefix_length(a, b):
+    """Length of the common prefix of a and b, found by bisecting with C level slice compares"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def common_suffix_length(a, b, limit):
+    """Length of the common suffix of a and b, at most limit"""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def quick_ratio(a, b):
+    """Upper bound on the similarity ratio from character counts alone, the same
+    as SequenceMatcher.quick_ratio() without building a matcher"""
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    return 2.0 * sum((Counter(a) & Counter(b)).values()) / total
+
+def opcodes_ratio(opcodes, len_a, len_b):
+    """Similarity ratio from opcodes, the same formula as SequenceMatcher.ratio()"""
+    total = len_a + len_b
+    if not total:
+        return 1.0
+    matches = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == 'equal')
+    return 2.0 * matches / total
+
+def merge_ranges(ranges):
+    """Join touching (start, end, is_equal) ranges of the same kind, so a run of
+    small replace/delete opcodes is painted with one call"""
+    merged = []
+    for start, end, is_equal in ranges:
+        if merged and merged[-1][2] == is_equal and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], end, is_equal)
+        else:
+            merged.append((start, end, is_equal))
+    return merged
+
+class DiffSignals(QObject):
+    """Signals of a DiffJob, a QRunnable can't define signals itself"""
+    estimated = pyqtSignal(float)  # upper bound of the similarity in percent
+    finished = pyqtSignal(float, list)  # similarity in percent, opcodes
+    error = pyqtSignal(str)  # Emitted instead of finished when diffing failed
+    done = pyqtSignal()  # Always emitted last, also by jobs cancelled before they ran
+
+class DiffJob(QRunnable):
+    """Thread pool task diffing the compared texts off the GUI thread"""
+    def __init__(self, job_id, comp_text1, comp_text2, estimate=False):
+        super().__init__()
+        self.signals = DiffSignals()
+        self.job_id = job_id  # Used by the window to discard superseded results
+        self.comp_text1 = comp_text1
+        self.comp_text2 = comp_text2
+        self.estimate = estimate  # Emit a quick upper bound before the full diff
+        self.is_running = True
+
+    def stop(self):
+        self.is_running = False
+
+    def run(self):
+        try:
+            # Jobs superseded while still queued in the pool end right here
+            if not self.is_running:
+                return
+            try:
+                if self.estimate:
+                    self.signals.estimated.emit(quick_ratio(self.comp_text1, self.comp_text2) * 100)
+                opcodes = diff_opcodes(self.comp_text1, self.comp_text2)
+                similarity = opcodes_ratio(opcodes, len(self.comp_text1), len(self.comp_text2)) * 100
+            except Exception as e:
+                print(f"Error comparing texts: {e}")
+                self.signals.error.emit(str(e))
+                return
+            self.signals.finished.emit(similarity, opcodes)
+        finally:
+            self.signals.done.emit()
 
 class TextComparisonApp(QMainWindow):
     def __init__(self):
@@ -17,7 +173,7 @@ class TextComparisonApp(QMainWindow):
             QWidget {
                 font-family: 'Segoe UI';
             }
-            QTextEdit {
+            QTextEdit, QPlainTextEdit {
                 background-color: white;
                 border: 2px solid #e9ecef;
                 border-radius: 8px;
@@ -25,7 +181,7 @@ class TextComparisonApp(QMainWindow):
                 font-size: 12pt;
                 selection-background-color: #e3f2fd;
             }
-            QTextEdit:focus {
+            QTextEdit:focus, QPlainTextEdit:focus {
                 border: 2px solid #1a73e8;
             }
             QPushButton {
@@ -83,9 +239,16 @@ class TextComparisonApp(QMainWindow):
         # Initialize settings
         self.case_sensitive = True
         self.ignore_whitespace = False
+        self.diff_cache = OrderedDict()  # (hashes, lengths) of the compared texts -> (similarity, opcodes)
+        self.diff_cache_size = 8
+        self.lower_cache = {}  # Raw input text -> lowered copy, for the two texts last compared
+        self.diff_job_id = 0  # Bumped for every comparison, results of older jobs are dropped
+        self.diff_jobs = set()  # Keeps pooled jobs alive until their result arrived
         self.update_timer = QTimer()
         self.update_timer.setSingleShot(True)
         self.update_timer.timeout.connect(self.compare_texts)
+        self.pending_since = QElapsedTimer()  # Started by the first edit the timer is waiting on
+        self.last_edit_size = 0  # Characters touched by the latest edit
 
         # Create main widget and layout
         main_widget = QWidget()
@@ -111,6 +274,7 @@ class TextComparisonApp(QMainWindow):
         self.original_label = QLabel("Original Text")
         self.original_text = QTextEdit()
         self.original_text.setPlaceholderText("Enter or paste your original text here...")
+        self.original_text.document().contentsChange.connect(self.on_contents_change)
         self.original_text.textChanged.connect(self.on_text_change)
         self.original_text.setAcceptRichText(False)  # Disable rich text
         self.original_text.setTextColor(QColor("#202124"))  # Set default text color
@@ -122,6 +286,7 @@ class TextComparisonApp(QMainWindow):
         self.comparison_label = QLabel("Comparison Text")
         self.comparison_text = QTextEdit()
         self.comparison_text.setPlaceholderText("Enter or paste your comparison text here...")
+        self.comparison_text.document().contentsChange.connect(self.on_contents_change)
         self.comparison_text.textChanged.connect(self.on_text_change)
         self.comparison_text.setAcceptRichText(False)  # Disable rich text
         self.comparison_text.setTextColor(QColor("#202124"))  # Set default text color
@@ -147,18 +312,32 @@ class TextComparisonApp(QMainWindow):
         diff_layout = QHBoxLayout()
         diff_layout.setSpacing(20)
         
-        # Original text differences
-        self.original_diff = QTextEdit()
+        # Original text differences, plain text panes lay out long documents
+        # much faster than rich text ones
+        self.original_diff = QPlainTextEdit()
         self.original_diff.setReadOnly(True)
+        self.original_diff.setUndoRedoEnabled(False)  # Read-only, don't record every refill
+        self.displayed_texts = {}  # diff pane -> the text it currently shows
+        self.highlighted = False  # Whether the diff panes carry highlighting
+        self.format_match = QTextCharFormat()
+        self.format_match.setBackground(QColor("#e8f5e9"))  # Green for matches
+        self.format_diff = QTextCharFormat()
+        self.format_diff.setBackground(QColor("#fff3e0"))  # Yellow for differences
         
         # Comparison text differences
-        self.comparison_diff = QTextEdit()
+        self.comparison_diff = QPlainTextEdit()
         self.comparison_diff.setReadOnly(True)
+        self.comparison_diff.setUndoRedoEnabled(False)
         
         diff_layout.addWidget(self.original_diff)
         diff_layout.addWidget(self.comparison_diff)
         layout.addLayout(diff_layout)
 
+        self.large_input_label = QLabel("Highlighting disabled for large input")
+        self.large_input_label.setObjectName("descriptionLabel")
+        self.large_input_label.hide()
+        layout.addWidget(self.large_input_label)
+
         # Create control buttons with improved layout
         button_layout = QHBoxLayout()
         button_layout.setSpacing(15)
@@ -277,44 +456,50 @@ class TextComparisonApp(QMainWindow):
         msg.exec_()
 
     def setup_synchronized_scrolling(self):
-        # Synchronize vertical scrolling
-        self.original_text.verticalScrollBar().valueChanged.connect(
-            lambda val: self.sync_scroll(val, [
-                self.comparison_text.verticalScrollBar(),
-                self.original_diff.verticalScrollBar(),
-                self.comparison_diff.verticalScrollBar()
-            ])
-        )
-        self.comparison_text.verticalScrollBar().valueChanged.connect(
-            lambda val: self.sync_scroll(val, [
-                self.original_text.verticalScrollBar(),
-                self.original_diff.verticalScrollBar(),
-                self.comparison_diff.verticalScrollBar()
-            ])
-        )
-        self.original_diff.verticalScrollBar().valueChanged.connect(
-            lambda val: self.sync_scroll(val, [
-                self.original_text.verticalScrollBar(),
-                self.comparison_text.verticalScrollBar(),
-                self.comparison_diff.verticalScrollBar()
-            ])
-        )
-        self.comparison_diff.verticalScrollBar().valueChanged.connect(
-            lambda val: self.sync_scroll(val, [
-                self.original_text.verticalScrollBar(),
-                self.comparison_text.verticalScrollBar(),
-                self.original_diff.verticalScrollBar()
-            ])
-        )
+        # Synchronize vertical scrolling through one guarded slot
+        self.synced_scrollbars = [
+            self.original_text.verticalScrollBar(),
+            self.comparison_text.verticalScrollBar(),
+            self.original_diff.verticalScrollBar(),
+            self.comparison_diff.verticalScrollBar()
+        ]
+        self.syncing_scroll = False
+        for scrollbar in self.synced_scrollbars:
+            scrollbar.valueChanged.connect(partial(self.sync_scroll, scrollbar))
+
+    def sync_scroll(self, source, value):
+        # Moving the other bars emits valueChanged from each of them again, ignore
+        # those echoes. Their signals can't be blocked instead, the views scroll
+        # through them
+        if self.syncing_scroll:
+            return
+        self.syncing_scroll = True
+        try:
+            for scrollbar in self.synced_scrollbars:
+                if scrollbar is not source:
+                    scrollbar.setValue(value)
+        finally:
+            self.syncing_scroll = False
 
-    def sync_scroll(self, value, scrollbars):
-        for scrollbar in scrollbars:
-            scrollbar.setValue(value)
+    def on_contents_change(self, position, chars_removed, chars_added):
+        # Emitted before textChanged, remember how big the edit was
+        self.last_edit_size = max(chars_removed, chars_added)
 
     def on_text_change(self):
-        # Reset the timer to prevent multiple rapid updates
-        self.update_timer.stop()
-        self.update_timer.start(1000)  # Wait for 1 second of no changes before updating
+        # Reset the timer to prevent multiple rapid updates. Typing in a small
+        # document updates almost at once, pastes and large documents wait longer
+        doc_size = (self.original_text.document().characterCount()
+                    + self.comparison_text.document().characterCount())
+        if self.last_edit_size < SMALL_EDIT_SIZE and doc_size < SMALL_DOC_SIZE:
+            delay = SMALL_EDIT_DELAY
+        else:
+            delay = LARGE_EDIT_DELAY
+        
+        # Don't let continuous typing put the comparison off forever
+        if not self.update_timer.isActive():
+            self.pending_since.start()
+        delay = max(0, min(delay, MAX_UPDATE_DELAY - self.pending_since.elapsed()))
+        self.update_timer.start(delay)
 
     def standardize_text(self, text):
         # Only standardize line endings
@@ -325,11 +510,11 @@ class TextComparisonApp(QMainWindow):
         text1 = self.original_text.toPlainText()
         text2 = self.comparison_text.toPlainText()
         
+        self.cancel_diff_jobs()
         if not text1 and not text2:
             self.progress_bar.setValue(0)
             self.similarity_label.setText("Similarity: 0.0%")
-            self.original_diff.clear()
-            self.comparison_diff.clear()
+            self.clear_diff_display()
             return
         
         # Create comparison texts based on settings
@@ -337,83 +522,182 @@ class TextComparisonApp(QMainWindow):
         comp_text2 = text2
         
         if not self.case_sensitive:
-            comp_text1 = comp_text1.lower()
-            comp_text2 = comp_text2.lower()
+            comp_text1 = self.lowered(comp_text1)
+            comp_text2 = self.lowered(comp_text2)
+            self.lower_cache = {text1: comp_text1, text2: comp_text2}
             
         if self.ignore_whitespace:
-            comp_text1 = ''.join(comp_text1.split())
-            comp_text2 = ''.join(comp_text2.split())
-        
-        # Calculate similarity using the modified texts
-        matcher = difflib.SequenceMatcher(None, comp_text1, comp_text2)
-        similarity = matcher.ratio() * 100
+            comp_text1 = strip_whitespace(comp_text1)
+            comp_text2 = strip_whitespace(comp_text2)
         
+        # Toggling a setting back and forth or a debounced no-op edit compares
+        # texts seen moments ago, reuse their result
+        key = (hash(comp_text1), hash(comp_text2), len(comp_text1), len(comp_text2))
+        if key in self.diff_cache:
+            self.diff_cache.move_to_end(key)
+            self.show_result(text1, text2, *self.diff_cache[key])
+        elif comp_text1 == comp_text2:
+            # Identical after the settings are applied, no matcher needed
+            self.show_result(text1, text2, 100.0, [('equal', 0, len(text1), 0, len(text2))])
+        else:
+            # Calculate similarity using the modified texts, line by line, on a
+            # pooled thread so large pastes don't freeze typing
+            # Large diffs take a moment, the job reports an upper bound first
+            estimate = len(comp_text1) + len(comp_text2) >= ESTIMATE_MIN_SIZE
+            job = DiffJob(self.diff_job_id, comp_text1, comp_text2, estimate)
+            job.signals.estimated.connect(lambda similarity: self.on_diff_estimated(job, similarity))
+            job.signals.finished.connect(
+                lambda similarity, opcodes: self.on_diff_finished(job, key, text1, text2, similarity, opcodes)
+            )
+            job.signals.error.connect(lambda message: self.on_diff_error(job, message))
+            job.signals.done.connect(lambda: self.diff_jobs.discard(job))
+            self.diff_jobs.add(job)
+            QThreadPool.globalInstance().start(job)
+
+    def lowered(self, text):
+        # Only lowercase a text again when it changed since the last comparison
+        cached = self.lower_cache.get(text)
+        return cached if cached is not None else text.lower()
+
+    def cancel_diff_jobs(self):
+        # Drop the results of older jobs, and skip those that haven't started yet
+        self.diff_job_id += 1
+        for job in self.diff_jobs:
+            job.stop()
+
+    def on_diff_estimated(self, job, similarity):
+        if job.job_id == self.diff_job_id:
+            self.similarity_label.setText(f"Similarity: up to {similarity:.1f}% (comparing...)")
+
+    def on_diff_error(self, job, message):
+        # Failures aren't cached, comparing the same texts again retries
+        if job.job_id == self.diff_job_id:
+            self.progress_bar.setValue(0)
+            self.similarity_label.setText(f"Error comparing texts: {message}")
+            self.clear_diff_display()
+
+    def on_diff_finished(self, job, key, text1, text2, similarity, opcodes):
+        self.diff_cache[key] = (similarity, opcodes)
+        if len(self.diff_cache) > self.diff_cache_size:
+            self.diff_cache.popitem(last=False)
+        if job.job_id == self.diff_job_id:
+            self.show_result(text1, text2, similarity, opcodes)
+
+    def show_result(self, text1, text2, similarity, opcodes):
         # Update progress
         self.progress_bar.setValue(int(similarity))
         self.similarity_label.setText(f"Similarity: {similarity:.1f}%")
         
         # Update difference displays using original texts for display
-        self.update_diff_display(text1, text2, matcher)
+        self.update_diff_display(text1, text2, opcodes)
 
-    def update_diff_display(self, text1, text2, matcher):
-        # Store current scroll positions
+    def update_diff_display(self, text1, text2, opcodes):
+        # Store current scroll positions; refilling resets them, which must not
+        # scroll the editors along
         original_scroll = self.original_diff.verticalScrollBar().value()
         comparison_scroll = self.comparison_diff.verticalScrollBar().value()
+        was_syncing = self.syncing_scroll
+        self.syncing_scroll = True
         
-        # Clear and insert text
-        self.original_diff.clear()
-        self.comparison_diff.clear()
-        self.original_diff.insertPlainText(text1)
-        self.comparison_diff.insertPlainText(text2)
+        # Repaint once at the end instead of after every change
+        self.original_diff.setUpdatesEnabled(False)
+        self.comparison_diff.setUpdatesEnabled(False)
         
-        # Apply formatting
-        original_cursor = self.original_diff.textCursor()
-        comparison_cursor = self.comparison_diff.textCursor()
+        # Only replace what changed since the last comparison
+        self.replace_text(self.original_diff, text1)
+        self.replace_text(self.comparison_diff, text2)
         
-        format_match = self.original_diff.currentCharFormat()
-        format_match.setBackground(QColor("#e8f5e9"))  # Green for matches
+        # Formatting a huge document costs far more than the diff itself, large
+        # inputs only get the similarity score
+        too_large = len(text1) + len(text2) > HIGHLIGHT_MAX_SIZE
+        self.large_input_label.setVisible(too_large)
+        if not too_large:
+            self.apply_highlighting(text1, text2, opcodes)
+        elif self.highlighted:
+            # The spliced panes keep the colors of the last small comparison
+            self.clear_highlighting()
+        self.highlighted = not too_large
         
-        format_diff = self.comparison_diff.currentCharFormat()
-        format_diff.setBackground(QColor("#fff3e0"))  # Yellow for differences
-        
-        # Clear any existing formatting
-        original_cursor.select(original_cursor.Document)
-        original_cursor.setCharFormat(self.original_diff.currentCharFormat())
-        comparison_cursor.select(comparison_cursor.Document)
-        comparison_cursor.setCharFormat(self.comparison_diff.currentCharFormat())
-
-        # Apply highlighting
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            if tag == 'equal':
-                # Highlight matching sections in green
-                original_cursor.setPosition(i1)
-                original_cursor.setPosition(i2, original_cursor.KeepAnchor)
-                original_cursor.mergeCharFormat(format_match)
-                
-                comparison_cursor.setPosition(j1)
-                comparison_cursor.setPosition(j2, comparison_cursor.KeepAnchor)
-                comparison_cursor.mergeCharFormat(format_match)
-            else:
-                # Highlight differences in yellow
-                if tag in ('replace', 'delete'):
-                    original_cursor.setPosition(i1)
-                    original_cursor.setPosition(i2, original_cursor.KeepAnchor)
-                    original_cursor.mergeCharFormat(format_diff)
-                
-                if tag in ('replace', 'insert'):
-                    comparison_cursor.setPosition(j1)
-                    comparison_cursor.setPosition(j2, comparison_cursor.KeepAnchor)
-                    comparison_cursor.mergeCharFormat(format_diff)
+        self.original_diff.setUpdatesEnabled(True)
+        self.comparison_diff.setUpdatesEnabled(True)
         
         # Restore scroll positions
         self.original_diff.verticalScrollBar().setValue(original_scroll)
         self.comparison_diff.verticalScrollBar().setValue(comparison_scroll)
+        self.syncing_scroll = was_syncing
+
+    def replace_text(self, diff_edit, text):
+        # Swap only the edited middle of the shown text, so the unchanged blocks
+        # before and after it keep their layout
+        old_text = self.displayed_texts.get(diff_edit)
+        self.displayed_texts[diff_edit] = text
+        if old_text is None:
+            diff_edit.setPlainText(text)
+            return
+        prefix = common_prefix_length(old_text, text)
+        suffix = common_suffix_length(old_text, text, min(len(old_text), len(text)) - prefix)
+        if prefix == len(old_text) == len(text):
+            return
+        # Characters above U+FFFF take two positions in the document
+        start = utf16_length(old_text[:prefix])
+        end = start + utf16_length(old_text[prefix:len(old_text) - suffix])
+        cursor = QTextCursor(diff_edit.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(text[prefix:len(text) - suffix])
+
+    def clear_diff_display(self):
+        self.original_diff.clear()
+        self.comparison_diff.clear()
+        self.displayed_texts.clear()
+        self.highlighted = False
+        self.large_input_label.hide()
+
+    def apply_highlighting(self, text1, text2, opcodes):
+        # Apply formatting, batched into one edit block per document so the
+        # layout is updated once instead of after every range
+        original_cursor = self.original_diff.textCursor()
+        comparison_cursor = self.comparison_diff.textCursor()
+        original_cursor.beginEditBlock()
+        comparison_cursor.beginEditBlock()
+        
+        # Ranges per side as (start, end, is_equal); the empty side of an insert
+        # or delete has nothing to paint
+        original_ranges = merge_ranges((i1, i2, tag == 'equal') for tag, i1, i2, _, _ in opcodes if i2 > i1)
+        comparison_ranges = merge_ranges((j1, j2, tag == 'equal') for tag, _, _, j1, j2 in opcodes if j2 > j1)
+        self.paint_ranges(original_cursor, len(text1), original_ranges, self.format_match, self.format_diff)
+        self.paint_ranges(comparison_cursor, len(text2), comparison_ranges, self.format_match, self.format_diff)
+        
+        original_cursor.endEditBlock()
+        comparison_cursor.endEditBlock()
+
+    def clear_highlighting(self):
+        # Only needed when highlighting is switched off, freshly painted panes
+        # are covered from start to end
+        for diff_edit in (self.original_diff, self.comparison_diff):
+            cursor = diff_edit.textCursor()
+            cursor.select(cursor.Document)
+            cursor.setCharFormat(QTextCharFormat())
+
+    def paint_ranges(self, cursor, length, ranges, format_match, format_diff):
+        # Paint the whole document in the color covering most of it with a
+        # single call, then only the ranges of the other color on top
+        equal_length = sum(end - start for start, end, is_equal in ranges if is_equal)
+        mostly_equal = 2 * equal_length >= length
+        cursor.select(cursor.Document)
+        cursor.setCharFormat(format_match if mostly_equal else format_diff)
+        minority_format = format_diff if mostly_equal else format_match
+        for start, end, is_equal in ranges:
+            if is_equal != mostly_equal:
+                cursor.setPosition(start)
+                cursor.setPosition(end, cursor.KeepAnchor)
+                cursor.setCharFormat(minority_format)
 
     def reset_fields(self):
+        self.cancel_diff_jobs()
         self.original_text.clear()
         self.comparison_text.clear()
-        self.original_diff.clear()
-        self.comparison_diff.clear()
+        self.clear_diff_display()
         self.progress_bar.setValue(0)
         self.similarity_label.setText("Similarity: 0.0%")
 
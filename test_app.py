@@ -0,0 +1,20 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QTextCursor
+
+import app
+
+qt_app = QApplication.instance() or QApplication([])
+
+
+def test_running_word_count_after_non_bmp_insert():
+    window = app.StringComparisonApp()
+    window.text1.setPlainText(" x")
+    cursor = QTextCursor(window.text1.document())
+    cursor.setPosition(0)
+    cursor.insertText("😀😀")
+    assert window._plain_texts[0] == "😀😀 x"
+    assert window._word_totals[0] == 2
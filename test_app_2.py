@@ -0,0 +1,19 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+import app_2
+
+qt_app = QApplication.instance() or QApplication([])
+
+
+def test_replace_text_after_non_bmp_character():
+    window = app_2.TextComparisonApp()
+    pane = window.original_diff
+    window.replace_text(pane, "hello 😀 world")
+    window.replace_text(pane, "hello 😀 world!")
+    assert pane.toPlainText() == "hello 😀 world!"
+    window.replace_text(pane, "hi 😀😀 world!")
+    assert pane.toPlainText() == "hi 😀😀 world!"